@@ -1,8 +1,13 @@
 import os
+import sys
 import pandas as pd
 import streamlit as st
 import altair as alt
 
+# shared analysis helpers live next to the notebooks
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", "..", "notebooks"))
+from ace_intelligence.speed_store import RouteSpeedStore, ace_start_dates_from_flags
+
 # ------------------------
 # Page Config
 # ------------------------
@@ -39,10 +44,17 @@ def load_csv(dataset_name: str) -> pd.DataFrame:
         df['month_dt'] = pd.to_datetime(df['month_dt'])
     return df
 
+@st.cache_resource
+def load_speed_store(dataset_name: str):
+    df = load_csv(dataset_name)
+    if df.empty:
+        return None, pd.Series(dtype="datetime64[ns]")
+    return RouteSpeedStore(df), ace_start_dates_from_flags(df)
+
 # ------------------------
 # Visualization Functions
 # ------------------------
-def plot_before_after_ace(df: pd.DataFrame, metric: str) -> alt.Chart:
+def plot_before_after_ace(df: pd.DataFrame, metric: str, cutoff=None) -> alt.Chart:
     if df.empty:
         return None
 
@@ -68,9 +80,17 @@ def plot_before_after_ace(df: pd.DataFrame, metric: str) -> alt.Chart:
         )
         .properties(height=400, title=f"{metric} Before vs After ACE")
     )
+
+    if cutoff is not None:
+        rule = (
+            alt.Chart(pd.DataFrame({"cutoff": [pd.Timestamp(cutoff)]}))
+            .mark_rule(color="red", strokeDash=[6, 4])
+            .encode(x="cutoff:T", tooltip=[alt.Tooltip("cutoff:T", title="Cutoff")])
+        )
+        chart = chart + rule
     return chart
 
-def plot_top_bottom_routes(df: pd.DataFrame) -> alt.Chart:
+def plot_top_bottom_routes(df: pd.DataFrame, metric: str = "Average Road Speed") -> alt.Chart:
     if df.empty:
         return None
 
@@ -91,9 +111,10 @@ def plot_top_bottom_routes(df: pd.DataFrame) -> alt.Chart:
         .mark_bar()
         .encode(
             x=alt.X("Route ID:N", sort=highlight["Route ID"].tolist(), title="Route ID"),
-            y=alt.Y("Pct Change:Q", title="% Change in Average Speed"),
+            y=alt.Y("Pct Change:Q", title=f"% Change in {metric}"),
             color=alt.condition(
-                alt.datum["Pct Change"] > 0,
+                # faster speeds and shorter travel times are improvements
+                alt.datum["Pct Change"] > 0 if "Speed" in metric else alt.datum["Pct Change"] < 0,
                 alt.value("green"),
                 alt.value("red")
             ),
@@ -102,7 +123,7 @@ def plot_top_bottom_routes(df: pd.DataFrame) -> alt.Chart:
         .properties(
             height=400,
             width=700,
-            title="Top/Bottom Routes by % Change in Average Speed After ACE"
+            title=f"Top/Bottom Routes by % Change in {metric} After ACE"
         )
     )
     return chart
@@ -114,16 +135,16 @@ def plot_top_bottom_routes(df: pd.DataFrame) -> alt.Chart:
 # ------------------------
 def main():
     df = load_csv("before_after_ace")
-    top_routes_df = load_csv("top5")
     if df.empty:
         st.stop()
+    store, ace_starts = load_speed_store("before_after_ace")
 
     st.title("🚍 ACE System & Bus Performance Dashboard")
 
     # ------------------------
     # Filters
     # ------------------------
-    filter_col1, filter_col2 = st.columns(2)
+    filter_col1, filter_col2, filter_col3 = st.columns(3)
 
     with filter_col1:
         route_options = sorted(df["Route ID"].dropna().unique().tolist())
@@ -133,6 +154,19 @@ def main():
         metric_options = ["Average Road Speed", "Average Travel Time"]
         selected_metric = st.selectbox("📊 Metric to Plot", metric_options)
 
+    with filter_col3:
+        use_route_starts = st.checkbox("📅 Split each route at its own ACE start", value=True)
+        month_options = [m.strftime("%Y-%m") for m in store.months]
+        selected_month = st.select_slider(
+            "✂️ Before/After Cutoff",
+            options=month_options,
+            value="2024-06" if "2024-06" in month_options else month_options[len(month_options) // 2],
+            disabled=use_route_starts
+        )
+
+    # per-route ACE start dates or one cutoff month for every route
+    cutoff = ace_starts if use_route_starts else pd.Timestamp(selected_month)
+
     # ------------------------
     # Apply Filters
     # ------------------------
@@ -145,36 +179,40 @@ def main():
     # ------------------------
     avg_val = filtered[selected_metric].mean() if not filtered.empty else 0
 
-    before_ace = filtered[filtered["is_ACE"] == False][selected_metric].mean()
-    after_ace = filtered[filtered["is_ACE"] == True][selected_metric].mean()
-
-    if pd.notnull(before_ace) and pd.notnull(after_ace) and before_ace != 0:
-        percent_change = ((after_ace - before_ace) / before_ace) * 100
+    route_result = store.before_after(cutoff, selected_metric, routes=[selected_route])
+    if not route_result.empty:
+        route_cutoff = route_result["cutoff"].iloc[0]
+        percent_change = route_result["pct_change"].iloc[0]
     else:
-        percent_change = None
+        route_cutoff, percent_change = None, None
 
     metric_unit = "mph" if "Speed" in selected_metric else "min"
 
     kpi_col1, kpi_col2 = st.columns(2)
     kpi_col1.metric(f"Average {selected_metric}", f"{avg_val:.2f} {metric_unit}")
-    if percent_change is not None:
-        kpi_col2.metric(f"Change After ACE", f"{percent_change:.2f}%", delta=f"{percent_change:.2f}%")
+    if percent_change is not None and pd.notnull(percent_change):
+        kpi_col2.metric(f"Change After {route_cutoff:%b %Y}", f"{percent_change:.2f}%", delta=f"{percent_change:.2f}%")
     else:
         kpi_col2.metric(f"Change After ACE", "N/A")
 
     # ------------------------
     # Plot Before vs After ACE
     # ------------------------
-    chart = plot_before_after_ace(filtered, selected_metric)
+    chart = plot_before_after_ace(filtered, selected_metric, route_cutoff)
     if chart:
         st.altair_chart(chart, use_container_width=True)
 
     # ------------------------
-    # Top/Bottom Routes Chart
+    # Top/Bottom Routes Chart (computed live for the selected cutoff)
     # ------------------------
+    top_routes_df = (
+        store.top_bottom(cutoff, selected_metric)
+        .reset_index()
+        .rename(columns={"route_id": "Route ID", "before": "False", "after": "True", "pct_change": "Pct Change"})
+    )
     if not top_routes_df.empty:
-        st.markdown("### 🚀 Top/Bottom Routes by Speed Change")
-        top_bottom_chart = plot_top_bottom_routes(top_routes_df)
+        st.markdown(f"### 🚀 Top/Bottom Routes by {selected_metric} Change")
+        top_bottom_chart = plot_top_bottom_routes(top_routes_df, selected_metric)
         if top_bottom_chart:
             st.altair_chart(top_bottom_chart, use_container_width=True)
 
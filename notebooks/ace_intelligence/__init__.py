@@ -0,0 +1,70 @@
+"""
+ACE Intelligence System - shared analysis helpers for the notebooks and dashboard
+
+names are resolved lazily from their submodules, so `from ace_intelligence.speed_store
+import RouteSpeedStore` (or the package-level name) only imports what it needs and not
+shapely, multiprocessing or the streaming engine
+"""
+
+import importlib
+
+_EXPORTS = {
+    'calendar_dimension': [
+        'ACE_IMPLEMENTATION_DATE',
+        'ACE_PILOT_START',
+        'add_calendar_features',
+        'build_calendar_dimension',
+        'hour_key',
+    ],
+    'cbd_spatial': [
+        'CONGESTION_PRICING_DATE',
+        'CBDZone',
+        'build_daily_route_series',
+        'compare_policy_periods',
+        'ensure_cbd_membership',
+        'label_cbd_violations',
+        'label_route_shapes',
+        'load_cbd_membership',
+        'save_cbd_membership',
+    ],
+    'speed_store': [
+        'RouteSpeedStore',
+        'ace_start_dates_from_flags',
+        'load_ace_start_dates',
+    ],
+    'campus_index': [
+        'BUFFER_DICT',
+        'CampusRadiusIndex',
+        'haversine_m',
+    ],
+    'parallel': [
+        'SharedFrameExecutor',
+        'benchmark_scaling',
+        'class_time_summary',
+        'violation_type_counts',
+    ],
+    'streaming': [
+        'HotspotDetector',
+        'SpaceSaving',
+        'follow_csv',
+        'load_replay_events',
+        'replay',
+    ],
+}
+
+_MODULE_OF = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = sorted(_MODULE_OF)
+
+
+def __getattr__(name):
+    module = _MODULE_OF.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
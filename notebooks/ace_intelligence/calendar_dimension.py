@@ -0,0 +1,220 @@
+"""
+hourly calendar dimension for temporal feature engineering
+
+every temporal label the notebooks use (rush period, semester, CUNY class change,
+holidays, ACE timeline flags) is computed once per clock hour instead of once per
+violation row. violations are then labelled by joining on an integer hour key.
+"""
+
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import USFederalHolidayCalendar
+
+# ------------------------
+# Timeline Constants
+# ------------------------
+CALENDAR_START = datetime(2015, 1, 1)
+ACE_PILOT_START = datetime(2019, 10, 1)  # initial pilot
+ACE_IMPLEMENTATION_DATE = datetime(2024, 6, 1)  # major expansion
+
+HOUR_KEY_MISSING = -1
+
+RUSH_HOUR_PERIODS = [
+    'morning_rush', 'midday', 'evening_rush', 'evening_activity', 'off_peak',
+    'weekend_midday', 'weekend_evening', 'weekend_off_peak',
+]
+TIME_PERIODS = ['Morning Rush', 'School Hours', 'Evening Rush', 'Off-Peak']
+# chart colours for the canonical time_period column
+TIME_PERIOD_COLORS = {
+    'Morning Rush': '#3366CC',
+    'School Hours': '#EE7733',
+    'Evening Rush': '#009E73',
+    'Off-Peak':     '#7F7F7F',
+}
+SEMESTER_PERIODS = ['spring_semester', 'summer_session', 'fall_semester']
+
+
+# ------------------------
+# Period Rules
+# ------------------------
+def classify_rush_hour(hour: int, day_of_week: int) -> str:
+    """classifying rush hour periods with weekday/weekend distinction"""
+    if day_of_week in [5, 6]:  # weekend
+        if 10 <= hour <= 14:  # weekend midday rush
+            return 'weekend_midday'
+        elif 18 <= hour <= 21:  # weekend evening activity
+            return 'weekend_evening'
+        else:
+            return 'weekend_off_peak'
+    else:  # weekday
+        if 7 <= hour <= 9:  # morning rush
+            return 'morning_rush'
+        elif 17 <= hour <= 19:  # evening rush
+            return 'evening_rush'
+        elif 10 <= hour <= 16:  # midday
+            return 'midday'
+        elif 20 <= hour <= 23:  # evening activity
+            return 'evening_activity'
+        else:  # late night/early morning
+            return 'off_peak'
+
+
+def categorize_time_period(hour: int) -> str:
+    """coarse enforcement periods used by the temporal pattern analysis"""
+    if 7 <= hour <= 9:
+        return 'Morning Rush'
+    elif 17 <= hour <= 19:
+        return 'Evening Rush'
+    elif 8 <= hour <= 15:
+        return 'School Hours'
+    else:
+        return 'Off-Peak'
+
+
+def get_semester_period(month: int) -> str:
+    """classifying academic periods (approximate)"""
+    if month in [9, 10, 11, 12]:  # fall semester
+        return 'fall_semester'
+    elif month in [1, 2, 3, 4, 5]:  # spring semester
+        return 'spring_semester'
+    else:  # summer
+        return 'summer_session'
+
+
+# lookup tables so the rules above run 168 / 24 / 12 times instead of once per row
+_RUSH_BY_DOW_HOUR = np.array([[classify_rush_hour(h, d) for h in range(24)] for d in range(7)], dtype=object)
+_TIME_PERIOD_BY_HOUR = np.array([categorize_time_period(h) for h in range(24)], dtype=object)
+_SEMESTER_BY_MONTH = np.array([None] + [get_semester_period(m) for m in range(1, 13)], dtype=object)
+
+
+# ------------------------
+# Hour Keys
+# ------------------------
+def hour_key(timestamps) -> np.ndarray:
+    """
+    converting timestamps to integer hour keys (whole hours since 1970-01-01)
+    missing timestamps map to HOUR_KEY_MISSING; tz-aware timestamps keep their local
+    wall-clock hour, matching the naive local times in the violations data
+    """
+    ts = pd.to_datetime(pd.Series(timestamps))
+    if ts.dt.tz is not None:
+        ts = ts.dt.tz_localize(None)
+    hours = ts.to_numpy().astype('datetime64[h]')
+    keys = hours.astype('int64')
+    keys[np.isnat(hours)] = HOUR_KEY_MISSING
+    return keys
+
+
+# ------------------------
+# Calendar Construction
+# ------------------------
+def build_calendar_dimension(start: datetime = CALENDAR_START,
+                             end: Optional[datetime] = None) -> pd.DataFrame:
+    """
+    building one row per clock hour between start and end (default: end of the current year)
+    with every temporal feature the notebooks derive from a violation timestamp
+    """
+    if end is None:
+        end = datetime(pd.Timestamp.now().year, 12, 31, 23)
+
+    keys = np.arange(hour_key([start])[0], hour_key([end])[0] + 1, dtype='int64')
+    hour_start = pd.DatetimeIndex(keys.astype('datetime64[h]').astype('datetime64[ns]'))
+
+    hour_of_day = hour_start.hour.to_numpy()
+    day_of_week = hour_start.dayofweek.to_numpy()  # 0=Monday
+    month = hour_start.month.to_numpy()
+    date = hour_start.normalize()
+
+    holidays = USFederalHolidayCalendar().holidays(start=date.min(), end=date.max())
+
+    calendar = pd.DataFrame({
+        'hour_key': keys,
+        'hour_start': hour_start,
+        'date': date,
+        'year': hour_start.year.to_numpy(),
+        'month': month,
+        'day_of_year': hour_start.dayofyear.to_numpy(),
+        'day_of_week': day_of_week,
+        'hour_of_day': hour_of_day,
+    })
+    calendar['is_weekend'] = calendar['day_of_week'].isin([5, 6])
+    calendar['is_holiday'] = calendar['date'].isin(holidays)
+
+    # rush hour and enforcement periods
+    calendar['rush_hour_period'] = pd.Categorical(
+        _RUSH_BY_DOW_HOUR[day_of_week, hour_of_day], categories=RUSH_HOUR_PERIODS
+    )
+    calendar['time_period'] = pd.Categorical(_TIME_PERIOD_BY_HOUR[hour_of_day], categories=TIME_PERIODS)
+    calendar['is_morning_rush'] = calendar['hour_of_day'].between(7, 9) & ~calendar['is_weekend']
+    calendar['is_evening_rush'] = calendar['hour_of_day'].between(17, 19) & ~calendar['is_weekend']
+    calendar['is_any_rush'] = calendar['is_morning_rush'] | calendar['is_evening_rush']
+    calendar['is_school_hours'] = calendar['hour_of_day'].between(8, 15) & ~calendar['is_weekend']
+
+    # CUNY academic calendar
+    calendar['semester_period'] = pd.Categorical(_SEMESTER_BY_MONTH[month], categories=SEMESTER_PERIODS)
+    calendar['is_academic_year'] = calendar['semester_period'].isin(['fall_semester', 'spring_semester'])
+    # class changes happen every hour 8am-6pm on teaching days; the minute window is applied per row
+    calendar['is_cuny_class_change_hour'] = (
+        calendar['hour_of_day'].between(8, 18) &
+        ~calendar['is_weekend'] &
+        ~calendar['is_holiday'] &
+        calendar['is_academic_year']
+    )
+
+    # ACE timeline
+    calendar['days_since_ace_implementation'] = (calendar['hour_start'] - ACE_IMPLEMENTATION_DATE).dt.days
+    calendar['days_since_ace_pilot'] = (calendar['hour_start'] - ACE_PILOT_START).dt.days
+    calendar['is_post_ace_expansion'] = calendar['hour_start'] >= ACE_IMPLEMENTATION_DATE
+    calendar['is_ace_pilot_period'] = (
+        (calendar['hour_start'] >= ACE_PILOT_START) &
+        (calendar['hour_start'] < ACE_IMPLEMENTATION_DATE)
+    )
+
+    return calendar
+
+
+# ------------------------
+# Joining
+# ------------------------
+def add_calendar_features(df: pd.DataFrame,
+                          timestamp_col: str,
+                          calendar: Optional[pd.DataFrame] = None,
+                          columns: Optional[list] = None) -> pd.DataFrame:
+    """
+    labelling every row of df with calendar features in one vectorized join on the hour key
+    adds the columns in place and returns df; rows with missing or out-of-range timestamps
+    get False flags, NA categories and (nullable Int64) NA integers
+    """
+    if calendar is None:
+        calendar = build_calendar_dimension()
+    if columns is None:
+        columns = [c for c in calendar.columns if c not in ('hour_key', 'hour_start', 'date')]
+
+    keys = hour_key(df[timestamp_col])
+    joined = calendar.set_index('hour_key')[columns].reindex(keys)
+    joined.index = df.index
+
+    # reindex turns bool/int columns into object/float when any key is missing
+    has_unmatched = not np.isin(keys, calendar['hour_key'].to_numpy()).all()
+    df['hour_key'] = keys
+    for col in columns:
+        dtype = calendar[col].dtype
+        if has_unmatched and dtype == bool:
+            df[col] = joined[col].fillna(False).astype(bool)
+        elif has_unmatched and pd.api.types.is_integer_dtype(dtype):
+            df[col] = joined[col].astype('Int64')
+        else:
+            df[col] = joined[col]
+
+    # minute-level refinement: 10 minutes either side of the hour
+    if 'is_cuny_class_change_hour' in columns:
+        minute = pd.to_datetime(df[timestamp_col]).dt.minute
+        df['is_cuny_class_change'] = (
+            df['is_cuny_class_change_hour'].eq(True) &
+            ((minute >= 50) | (minute <= 10))
+        )
+
+    return df
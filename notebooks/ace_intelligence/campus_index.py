@@ -0,0 +1,272 @@
+"""
+radius-parameterized campus -> stop -> route membership index
+
+for each CUNY campus the stops within a maximum radius are stored sorted by distance,
+with prefix-summed violation counts. routes are stored by the distance of their nearest
+stop with prefix-summed ridership. "routes, stops and violations within R metres of
+campus C" is then a binary search plus a lookup, for any R up to the maximum radius,
+instead of re-buffering campuses and redoing the spatial join and merges.
+"""
+
+import json
+import os
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS_M = 6371000
+WEB_MERCATOR_RADIUS_M = 6378137
+DEFAULT_MAX_RADIUS_M = 2000
+DEFAULT_RADIUS_M = 500  # fallback used when a campus has no entry in buffer_dict
+
+# dynamic buffer sizes (in meters) determined by general campus size (Cuny_Analytics)
+BUFFER_DICT = {
+    "Borough of Manhattan Community College": 400,
+    "Bronx Community College": 600,
+    "Hostos Community College": 400,
+    "Kingsborough Community College": 800,
+    "LaGuardia Community College": 500,
+    "Queensborough Community College": 700,
+    "Guttman Community College": 300,
+    "Medgar Evers College": 500,
+    "New York City College of Technology": 400,
+    "College of Staten Island": 1000,
+    "School of Labor and Urban Studies": 300,
+    "School of Law": 400,
+    "The Graduate School and University Center": 300,
+    "School of Professional Studies": 300,
+    "School of Public Health": 300,
+    "School of Journalism": 300,
+    "Macaulay Honors College": 300,
+    "Baruch College": 400,
+    "Brooklyn College": 700,
+    "The City College of New York": 700,
+    "School of Medicine": 400,
+    "Hunter College": 400,
+    "John Jay College of Criminal Justice": 400,
+    "Lehman College": 700,
+    "Queens College": 800,
+    "York College": 600
+}
+
+
+# ------------------------
+# Distances
+# ------------------------
+def haversine_m(lat, lon, lats, lons) -> np.ndarray:
+    """great-circle distance in meters from one point to many"""
+    lat, lon = np.radians(lat), np.radians(lon)
+    lats, lons = np.radians(np.asarray(lats, dtype='float64')), np.radians(np.asarray(lons, dtype='float64'))
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+def web_mercator_m(lat, lon, lats, lons) -> np.ndarray:
+    """
+    planar distance in EPSG:3857 units, i.e. what buffering in to_crs(3857) measures
+    (about 1.3x true meters at NYC latitudes); use it to reproduce the buffer_dict outputs
+    """
+    def project(la, lo):
+        la, lo = np.radians(np.asarray(la, dtype='float64')), np.radians(np.asarray(lo, dtype='float64'))
+        return WEB_MERCATOR_RADIUS_M * lo, WEB_MERCATOR_RADIUS_M * np.log(np.tan(np.pi / 4 + la / 2))
+
+    x0, y0 = project(lat, lon)
+    x, y = project(lats, lons)
+    return np.hypot(x - x0, y - y0)
+
+
+DISTANCE_FUNCTIONS = {'haversine': haversine_m, 'web_mercator': web_mercator_m}
+
+
+def normalize_ids(values) -> pd.Index:
+    """
+    string keys for stop ids, so 401234, 401234.0 (a float column with NaN) and '401234'
+    all match; non-numeric ids are kept as stripped strings
+    """
+    values = pd.Series(values)
+    numeric = pd.to_numeric(values, errors='coerce')
+    integral = numeric.notna() & (numeric % 1 == 0)
+    keys = values.astype(str).str.strip()
+    keys[integral] = numeric[integral].astype('int64').astype(str)
+    return pd.Index(keys)
+
+
+# ------------------------
+# Campus Radius Index
+# ------------------------
+class CampusRadiusIndex:
+    """
+    per-campus stops and routes sorted by distance, with prefix sums for radius queries
+    """
+
+    def __init__(self, entries: Dict[str, dict], max_radius: float, distance: str,
+                 latitudes: Optional[Dict[str, float]] = None):
+        self.entries = entries
+        self.max_radius = max_radius
+        self.distance = distance
+        self.latitudes = latitudes or {}
+
+    @property
+    def campuses(self) -> list:
+        return list(self.entries)
+
+    @classmethod
+    def build(cls,
+              campuses: pd.DataFrame,
+              stops: pd.DataFrame,
+              stops_to_route: pd.DataFrame,
+              stop_violations: Optional[pd.Series] = None,
+              route_ridership: Optional[pd.Series] = None,
+              max_radius: float = DEFAULT_MAX_RADIUS_M,
+              distance: str = 'haversine',
+              campus_col: str = 'campus',
+              lat_col: str = 'lat',
+              lon_col: str = 'long') -> 'CampusRadiusIndex':
+        """
+        building the index once from campuses (name, lat, long), GTFS stops (stop_id,
+        stop_lat, stop_lon), the stop -> route lookup, violation counts per stop_id and
+        ridership per route_id
+        """
+        distance_fn = DISTANCE_FUNCTIONS[distance]
+
+        # GTFS feeds repeat shared stops; one row per stop_id
+        stop_ids = normalize_ids(stops['stop_id'])
+        unique = ~stop_ids.duplicated()
+        stops, stop_ids = stops[unique], stop_ids[unique].to_numpy()
+        stop_lats = stops['stop_lat'].to_numpy(dtype='float64')
+        stop_lons = stops['stop_lon'].to_numpy(dtype='float64')
+
+        if stop_violations is None:
+            stop_violations = pd.Series(dtype='float64')
+        stop_violations = stop_violations.groupby(normalize_ids(stop_violations.index)).sum()
+
+        if route_ridership is None:
+            route_ridership = pd.Series(dtype='float64')
+        route_ridership = route_ridership.copy()
+        route_ridership.index = route_ridership.index.astype(str)
+
+        lookup = stops_to_route[['stop_id', 'route_id']].dropna()
+        lookup = pd.DataFrame({
+            'stop_id': normalize_ids(lookup['stop_id']),
+            'route_id': lookup['route_id'].astype(str).str.strip().to_numpy(),
+        }).drop_duplicates()
+
+        entries, latitudes = {}, {}
+        for _, campus in campuses.iterrows():
+            latitudes[campus[campus_col]] = float(campus[lat_col])
+            dist = distance_fn(campus[lat_col], campus[lon_col], stop_lats, stop_lons)
+            near = np.flatnonzero(dist <= max_radius)
+            order = near[np.argsort(dist[near], kind='stable')]
+
+            near_stops = pd.DataFrame({'stop_id': stop_ids[order], 'distance': dist[order]})
+            near_stops['violations'] = near_stops['stop_id'].map(stop_violations).fillna(0).to_numpy()
+
+            # a route enters the radius at the distance of its nearest stop
+            near_routes = (
+                near_stops[['stop_id', 'distance']].merge(lookup, on='stop_id', how='inner')
+                .groupby('route_id', as_index=False)['distance'].min()
+                .sort_values(['distance', 'route_id'], kind='stable')
+            )
+            near_routes['ridership'] = near_routes['route_id'].map(route_ridership).fillna(0).to_numpy()
+
+            entries[campus[campus_col]] = {
+                'stop_distance': near_stops['distance'].to_numpy(),
+                'stop_id': near_stops['stop_id'].to_numpy(),
+                'cum_violations': np.concatenate([[0], near_stops['violations'].cumsum().to_numpy()]),
+                'route_distance': near_routes['distance'].to_numpy(),
+                'route_id': near_routes['route_id'].to_numpy(),
+                'cum_ridership': np.concatenate([[0], near_routes['ridership'].cumsum().to_numpy()]),
+            }
+
+        return cls(entries, max_radius, distance, latitudes)
+
+    def buffer_radii_m(self, buffers: Dict[str, float] = BUFFER_DICT) -> Dict[str, float]:
+        """
+        buffer_dict sizes are EPSG:3857 units; on a haversine index they are converted to
+        true meters at each campus's latitude (a 500 unit buffer is about 380 m in NYC)
+        """
+        if self.distance != 'haversine':
+            return dict(buffers)
+        return {campus: float(radius * np.cos(np.radians(self.latitudes[campus]))) if campus in self.latitudes else radius
+                for campus, radius in buffers.items()}
+
+    # ------------------------
+    # Queries
+    # ------------------------
+    def _check_radius(self, radius: float) -> None:
+        if radius > self.max_radius:
+            raise ValueError(f"radius {radius} m exceeds the index maximum of {self.max_radius} m")
+
+    def stops_within(self, campus: str, radius: float) -> np.ndarray:
+        self._check_radius(radius)
+        entry = self.entries[campus]
+        return entry['stop_id'][:np.searchsorted(entry['stop_distance'], radius, side='right')]
+
+    def routes_within(self, campus: str, radius: float) -> np.ndarray:
+        self._check_radius(radius)
+        entry = self.entries[campus]
+        return entry['route_id'][:np.searchsorted(entry['route_distance'], radius, side='right')]
+
+    def totals(self, campus: str, radius: float) -> dict:
+        """stop, route, violation and ridership totals within radius meters of one campus"""
+        self._check_radius(radius)
+        entry = self.entries[campus]
+        n_stops = int(np.searchsorted(entry['stop_distance'], radius, side='right'))
+        n_routes = int(np.searchsorted(entry['route_distance'], radius, side='right'))
+        return {
+            'campus_name': campus,
+            'radius_m': radius,
+            'stops': n_stops,
+            'routes': n_routes,
+            'total_violations': int(entry['cum_violations'][n_stops]),
+            'total_ridership': int(entry['cum_ridership'][n_routes]),
+        }
+
+    def summary(self, radius: Union[float, Dict[str, float]] = DEFAULT_RADIUS_M,
+                default_radius: float = DEFAULT_RADIUS_M) -> pd.DataFrame:
+        """
+        campus-level totals (the campus_summary view) for one radius for every campus
+        or a per-campus mapping such as BUFFER_DICT
+        """
+        rows = []
+        for campus in self.entries:
+            r = radius.get(campus, default_radius) if isinstance(radius, dict) else radius
+            rows.append(self.totals(campus, r))
+        return pd.DataFrame(rows)
+
+    # ------------------------
+    # Persistence
+    # ------------------------
+    def to_json(self, path: str) -> None:
+        """exporting the index so pages can answer radius queries without the raw data"""
+        payload = {
+            'max_radius': self.max_radius,
+            'distance': self.distance,
+            'latitudes': self.latitudes,
+            'campuses': {
+                campus: {
+                    key: [round(float(v), 1) for v in values] if 'distance' in key
+                    else [str(v) for v in values] if key in ('stop_id', 'route_id')
+                    else [int(v) for v in values]
+                    for key, values in entry.items()
+                }
+                for campus, entry in self.entries.items()
+            },
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f)
+
+    @classmethod
+    def from_json(cls, path: str) -> 'CampusRadiusIndex':
+        with open(path, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+        entries = {
+            campus: {
+                key: np.asarray(values, dtype=object if key in ('stop_id', 'route_id') else 'float64')
+                for key, values in entry.items()
+            }
+            for campus, entry in payload['campuses'].items()
+        }
+        return cls(entries, payload['max_radius'], payload['distance'], payload.get('latitudes'))
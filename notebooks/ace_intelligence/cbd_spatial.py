@@ -0,0 +1,305 @@
+"""
+spatial membership engine for the Manhattan CBD (congestion pricing zone)
+
+the CBD polygon is prepared once and routes are indexed in an STRtree, so every violation
+and every route is labelled inside / crossing / outside in a single vectorized pass.
+the labels are persisted as columns; pre/post policy comparisons then run as grouped
+queries on daily per-route series instead of repeating any spatial work.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import shapely
+from shapely.geometry import mapping, shape
+from shapely.strtree import STRtree
+
+# ------------------------
+# Constants
+# ------------------------
+RESOURCES_DIR = Path(__file__).resolve().parents[2] / 'resources'
+CBD_GEOJSON_PATH = RESOURCES_DIR / 'cbd_zone.geojson'
+BUS_ROUTES_GEOJSON_PATH = RESOURCES_DIR / 'bus_routes.geojson'
+
+CONGESTION_PRICING_DATE = datetime(2025, 1, 5)
+
+INSIDE = 'inside'
+CROSSING = 'crossing'
+OUTSIDE = 'outside'
+MEMBERSHIP_LEVELS = [INSIDE, CROSSING, OUTSIDE]
+
+FINGERPRINT_KEY = b'cbd_fingerprint'
+
+
+def read_geojson_features(path) -> list:
+    """reading a GeoJSON file into (properties, shapely geometry) pairs"""
+    with open(path, 'r', encoding='utf-8') as f:
+        gj = json.load(f)
+    return [(feat.get('properties') or {}, shape(feat['geometry']))
+            for feat in gj.get('features', []) if feat.get('geometry')]
+
+
+def _as_membership(labels) -> pd.Categorical:
+    return pd.Categorical(labels, categories=MEMBERSHIP_LEVELS)
+
+
+def _combine_memberships(labels: pd.Series) -> str:
+    """a route is inside/outside only if every part is; any mix counts as crossing"""
+    seen = set(labels)
+    if len(seen) == 1:
+        return seen.pop()
+    return CROSSING
+
+
+# ------------------------
+# CBD Zone
+# ------------------------
+class CBDZone:
+    """
+    prepared CBD polygon with vectorized membership tests for points and geometries
+    """
+
+    def __init__(self, geometry):
+        self.geometry = geometry
+        shapely.prepare(self.geometry)
+        self.min_lon, self.min_lat, self.max_lon, self.max_lat = geometry.bounds
+
+    @classmethod
+    def from_geojson(cls, path=CBD_GEOJSON_PATH) -> 'CBDZone':
+        """loading the CBD polygon(s) from GeoJSON and merging them into one geometry"""
+        geoms = [geom for _, geom in read_geojson_features(path)]
+        if not geoms:
+            raise ValueError(f"no CBD geometry found in {path}")
+        return cls(shapely.union_all(geoms))
+
+    def to_geojson(self) -> dict:
+        """GeoJSON mapping of the zone, e.g. for folium overlays"""
+        return mapping(self.geometry)
+
+    def label_points(self, lon, lat) -> pd.Categorical:
+        """
+        labelling coordinates as inside/outside the CBD
+        a bounding-box prefilter skips the polygon test for most of the city
+        """
+        lon = np.asarray(lon, dtype='float64')
+        lat = np.asarray(lat, dtype='float64')
+        inside = np.zeros(len(lon), dtype=bool)
+
+        candidates = np.flatnonzero(
+            (lon >= self.min_lon) & (lon <= self.max_lon) &
+            (lat >= self.min_lat) & (lat <= self.max_lat)
+        )
+        inside[candidates] = shapely.intersects_xy(self.geometry, lon[candidates], lat[candidates])
+
+        codes = np.where(inside, MEMBERSHIP_LEVELS.index(INSIDE), MEMBERSHIP_LEVELS.index(OUTSIDE))
+        return pd.Categorical.from_codes(codes, categories=MEMBERSHIP_LEVELS)
+
+    def label_geometries(self, geometries) -> pd.Categorical:
+        """
+        labelling line/polygon geometries as inside, crossing or outside the CBD
+        the STRtree narrows the exact predicate tests to geometries whose extent meets the zone
+        """
+        geometries = np.asarray(geometries, dtype=object)
+        labels = np.full(len(geometries), OUTSIDE, dtype=object)
+        if len(geometries) == 0:
+            return _as_membership(labels)
+
+        tree = STRtree(geometries)
+        hits = tree.query(self.geometry, predicate='intersects')
+        covered = shapely.covered_by(geometries[hits], self.geometry)
+        labels[hits] = np.where(covered, INSIDE, CROSSING)
+
+        return _as_membership(labels)
+
+
+# ------------------------
+# Route and Violation Labels
+# ------------------------
+def label_route_shapes(zone: CBDZone, routes_path=BUS_ROUTES_GEOJSON_PATH) -> pd.DataFrame:
+    """labelling every route shape in bus_routes.geojson against the CBD"""
+    features = read_geojson_features(routes_path)
+    shapes = pd.DataFrame({
+        'route_id': [str(props.get('route_id') or props.get('route') or '').strip() for props, _ in features],
+        'shape_id': [props.get('shape_id') for props, _ in features],
+    })
+    shapes['cbd_membership'] = zone.label_geometries([geom for _, geom in features])
+    return shapes
+
+
+def route_memberships(violations_df: pd.DataFrame,
+                      route_shapes: Optional[pd.DataFrame] = None) -> pd.Series:
+    """
+    one CBD membership per route_id
+    routes with geometry in bus_routes.geojson use their shapes; the remaining routes are
+    derived from where their violations fall (all inside, some inside, or none)
+    """
+    share_inside = (violations_df['cbd_location'] == INSIDE).groupby(violations_df['route_id'], observed=True).mean()
+    from_points = pd.Series(
+        np.select([share_inside == 1, share_inside == 0], [INSIDE, OUTSIDE], CROSSING),
+        index=share_inside.index,
+    )
+    if route_shapes is None or route_shapes.empty:
+        return from_points.rename('cbd_route_membership')
+
+    from_shapes = (
+        route_shapes.groupby('route_id')['cbd_membership']
+        .agg(lambda s: _combine_memberships(s.astype(str)))
+    )
+    combined = from_shapes.combine_first(from_points)
+    return combined.rename('cbd_route_membership')
+
+
+def label_cbd_violations(violations_df: pd.DataFrame,
+                         zone: CBDZone,
+                         route_shapes: Optional[pd.DataFrame] = None,
+                         lat_col: str = 'Violation Latitude',
+                         lon_col: str = 'Violation Longitude') -> pd.DataFrame:
+    """
+    adding cbd_location (inside/outside) and cbd_route_membership (inside/crossing/outside)
+    columns in place and returning violations_df
+    """
+    violations_df['cbd_location'] = zone.label_points(violations_df[lon_col], violations_df[lat_col])
+
+    # mapping through the route categories keeps this a per-route, not per-row, lookup
+    memberships = route_memberships(violations_df, route_shapes)
+    routes = violations_df['route_id'].astype('category')
+    route_labels = _as_membership(memberships.reindex(routes.cat.categories).fillna(OUTSIDE))
+    route_codes = routes.cat.codes.to_numpy()
+    codes = np.where(route_codes >= 0, np.asarray(route_labels.codes)[route_codes], MEMBERSHIP_LEVELS.index(OUTSIDE))
+    violations_df['cbd_route_membership'] = pd.Categorical.from_codes(codes, categories=MEMBERSHIP_LEVELS)
+    return violations_df
+
+
+def membership_fingerprint(zone: CBDZone, route_shapes: Optional[pd.DataFrame] = None) -> str:
+    """hash of the CBD geometry and route shape labels the membership columns were derived from"""
+    digest = hashlib.sha256(shapely.to_wkb(zone.geometry))
+    if route_shapes is not None and not route_shapes.empty:
+        labels = route_shapes[['route_id', 'shape_id', 'cbd_membership']].astype(str)
+        digest.update(pd.util.hash_pandas_object(labels, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def save_cbd_membership(violations_df: pd.DataFrame, path, id_col: str = 'Violation ID',
+                        fingerprint: Optional[str] = None) -> None:
+    """persisting the membership columns (and the geometry fingerprint) so later sessions skip the spatial pass"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    table = pa.Table.from_pandas(violations_df[[id_col, 'cbd_location', 'cbd_route_membership']], preserve_index=False)
+    if fingerprint is not None:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), FINGERPRINT_KEY: fingerprint.encode()})
+    pq.write_table(table, path)
+
+
+def load_cbd_membership(violations_df: pd.DataFrame, path, id_col: str = 'Violation ID',
+                        fingerprint: Optional[str] = None) -> bool:
+    """
+    restoring persisted membership columns in place; returns False if the file is missing
+    or was built from different geometry than fingerprint
+    """
+    if not os.path.exists(path):
+        return False
+    if fingerprint is not None:
+        stored_fingerprint = (pq.read_schema(path).metadata or {}).get(FINGERPRINT_KEY, b'').decode()
+        if stored_fingerprint != fingerprint:
+            return False
+
+    stored = pd.read_parquet(path).set_index(id_col)
+    for col in ['cbd_location', 'cbd_route_membership']:
+        violations_df[col] = _as_membership(violations_df[id_col].map(stored[col].astype(str)))
+    return True
+
+
+def ensure_cbd_membership(violations_df: pd.DataFrame,
+                          zone: CBDZone,
+                          route_shapes: Optional[pd.DataFrame] = None,
+                          path=None) -> pd.DataFrame:
+    """
+    loading persisted membership labels when they cover every violation and were built
+    from the same CBD and route geometry, otherwise running the spatial pass once and
+    persisting the result
+    """
+    fingerprint = membership_fingerprint(zone, route_shapes)
+    if path is not None and load_cbd_membership(violations_df, path, fingerprint=fingerprint) \
+            and violations_df['cbd_location'].notna().all():
+        print(f"CBD membership loaded from {path}")
+        return violations_df
+
+    label_cbd_violations(violations_df, zone, route_shapes)
+    if path is not None:
+        save_cbd_membership(violations_df, path, fingerprint=fingerprint)
+        print(f"CBD membership saved to {path}")
+    return violations_df
+
+
+# ------------------------
+# Policy Period Queries
+# ------------------------
+def build_daily_route_series(violations_df: pd.DataFrame, time_col: str = 'violation_time') -> pd.DataFrame:
+    """
+    collapsing violations to one row per route and day
+    carries the route membership so pre/post queries never touch the raw rows again
+    """
+    daily = violations_df.assign(
+        date=pd.to_datetime(violations_df[time_col]).dt.normalize(),
+        is_cbd=violations_df['cbd_location'] == INSIDE,
+    ).groupby(['route_id', 'date'], observed=True).agg(
+        violations=('is_cbd', 'size'),
+        cbd_violations=('is_cbd', 'sum'),
+        ticketed_violations=('is_ticketed', 'sum'),
+    ).reset_index()
+
+    memberships = (
+        violations_df.drop_duplicates('route_id').set_index('route_id')['cbd_route_membership']
+    )
+    daily['cbd_route_membership'] = _as_membership(daily['route_id'].map(memberships).astype(str))
+    return daily
+
+
+def compare_policy_periods(daily: pd.DataFrame,
+                           policy_date: datetime = CONGESTION_PRICING_DATE,
+                           days_before: Optional[int] = None,
+                           days_after: Optional[int] = None,
+                           group_col: Optional[str] = 'cbd_route_membership',
+                           routes: Optional[Iterable] = None) -> pd.DataFrame:
+    """
+    comparing daily violation rates and ticketing rates before vs after a policy date
+    windows default to all available days on either side; group_col=None gives one overall row
+    """
+    policy_date = pd.Timestamp(policy_date)
+    start = policy_date - pd.Timedelta(days=days_before) if days_before is not None else daily['date'].min()
+    end = (policy_date + pd.Timedelta(days=days_after) if days_after is not None
+           else daily['date'].max() + pd.Timedelta(days=1))
+
+    window = daily[(daily['date'] >= start) & (daily['date'] < end)]
+    if routes is not None:
+        window = window[window['route_id'].isin(set(routes))]
+
+    period = pd.Series(np.where(window['date'] < policy_date, 'before', 'after'), index=window.index, name='period')
+    group = window[group_col] if group_col is not None else pd.Series('all', index=window.index, name='group')
+    totals = (
+        window.groupby([group, period], observed=True)[['violations', 'ticketed_violations']].sum()
+        .unstack('period', fill_value=0)
+    )
+
+    n_days = {'before': max((policy_date - start).days, 1), 'after': max((end - policy_date).days, 1)}
+
+    result = pd.DataFrame(index=totals.index)
+    for p in ['before', 'after']:
+        violations = totals['violations'][p] if p in totals['violations'] else 0
+        ticketed = totals['ticketed_violations'][p] if p in totals['ticketed_violations'] else 0
+        result[f'{p}_daily_violations'] = violations / n_days[p]
+        result[f'{p}_ticketing_rate'] = ticketed / pd.Series(violations, index=totals.index).replace(0, np.nan)
+
+    result['violation_change_pct'] = (
+        (result['after_daily_violations'] - result['before_daily_violations'])
+        / result['before_daily_violations'].replace(0, np.nan) * 100
+    )
+    result['ticketing_change'] = result['after_ticketing_rate'] - result['before_ticketing_rate']
+    return result
@@ -0,0 +1,384 @@
+"""
+shared-memory process-pool executor for per-route, per-campus and per-borough analyses
+
+the core violation columns are copied once into shared memory blocks (strings as integer
+codes, timestamps as int64, nullable columns as values plus a mask), stored in group
+order with precomputed offsets. workers attach to the blocks by name instead of receiving
+a pickled frame, and each task only ships a list of (start, stop) offsets. for a single
+group key the numeric, bool and datetime columns are slices of the shared blocks (no
+copy); string columns are decoded from their codes, and groups spanning several keys
+(e.g. a campus's routes) are gathered back into original row order, which copies.
+"""
+
+import contextlib
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# the columns the notebook 04 route/campus/cohort analyses read
+CORE_COLUMNS = [
+    'Violation ID', 'route_id', 'violation_time', 'Violation Type',
+    'is_ticketed', 'is_technical_issue',
+]
+
+CLASS_HOURS = range(8, 19)  # 8am-6pm, as in analyze_cuny_impact
+
+_MASKED_ARRAYS = (pd.arrays.BooleanArray, pd.arrays.IntegerArray, pd.arrays.FloatingArray)
+
+
+# ------------------------
+# Shared Columns
+# ------------------------
+def _encode_column(series: pd.Series):
+    """splitting a column into a fixed-width numpy array plus what is needed to restore it"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), {'kind': 'category', 'categories': series.cat.categories}
+    if pd.api.types.is_datetime64_any_dtype(series):
+        tz = series.dt.tz
+        naive = (series.dt.tz_convert(None) if tz is not None else series).to_numpy()
+        return naive.view('int64'), {'kind': 'datetime', 'datetime_dtype': naive.dtype.str, 'tz': tz}
+    if series.dtype == object or pd.api.types.is_string_dtype(series):
+        codes, uniques = pd.factorize(series)
+        return codes, {'kind': 'object', 'categories': pd.Index(uniques, dtype=object)}
+    if isinstance(series.dtype, pd.api.extensions.ExtensionDtype):
+        # nullable boolean / Int64 / Float64: plain values plus an NA mask
+        if not issubclass(series.dtype.construct_array_type(), _MASKED_ARRAYS):
+            raise TypeError(f"column {series.name!r} has unsupported dtype {series.dtype} for shared memory")
+        numpy_dtype = series.dtype.numpy_dtype
+        mask = series.isna().to_numpy()
+        values = series.to_numpy(dtype=numpy_dtype, na_value=numpy_dtype.type(0))
+        return values, {'kind': 'masked', 'extension_dtype': series.dtype, 'mask': mask}
+    return series.to_numpy(), {'kind': 'numeric'}
+
+
+def _decode_column(values: np.ndarray, meta: dict, mask: Optional[np.ndarray] = None):
+    kind = meta['kind']
+    if kind == 'category':
+        return pd.Categorical.from_codes(values, categories=meta['categories'])
+    if kind == 'datetime':
+        stamps = values.view(meta['datetime_dtype'])
+        if meta['tz'] is None:
+            return stamps
+        return pd.DatetimeIndex(stamps).tz_localize('UTC').tz_convert(meta['tz'])
+    if kind == 'object':
+        decoded = np.full(len(values), np.nan, dtype=object)
+        known = values >= 0
+        decoded[known] = np.asarray(meta['categories'], dtype=object)[values[known]]
+        return decoded
+    if kind == 'masked':
+        return meta['extension_dtype'].construct_array_type()(values, mask)
+    return values
+
+
+class SharedColumns:
+    """
+    numpy columns backed by named shared memory blocks
+    the owner creates and unlinks the blocks; workers attach from the picklable spec
+    """
+
+    def __init__(self, spec: dict, blocks: Dict[str, shared_memory.SharedMemory], owner: bool):
+        self.spec = spec
+        self._blocks = blocks
+        self._owner = owner
+        self.arrays = {}
+        for name, col in spec['columns'].items():
+            array = np.ndarray(col['shape'], dtype=col['dtype'], buffer=blocks[name].buf)
+            array.flags.writeable = False  # analysis functions get views, never write through them
+            self.arrays[name] = array
+
+    @classmethod
+    def create(cls, arrays: Dict[str, np.ndarray], meta: Optional[Dict[str, dict]] = None) -> 'SharedColumns':
+        """copying each array into its own shared memory block"""
+        meta = meta or {}
+        for name, values in arrays.items():
+            if values.dtype.hasobject:
+                # object arrays would share PyObject pointers that are meaningless in a worker
+                raise TypeError(f"column {name!r} is an object array and cannot be placed in shared memory")
+
+        blocks, columns = {}, {}
+        for name, values in arrays.items():
+            values = np.ascontiguousarray(values)
+            block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+            np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[...] = values
+            blocks[name] = block
+            columns[name] = {
+                **meta.get(name, {'kind': 'numeric'}),
+                'block': block.name, 'shape': values.shape, 'dtype': values.dtype.str,
+            }
+        return cls({'columns': columns}, blocks, owner=True)
+
+    @classmethod
+    def attach(cls, spec: dict) -> 'SharedColumns':
+        blocks = {name: shared_memory.SharedMemory(name=col['block']) for name, col in spec['columns'].items()}
+        return cls(spec, blocks, owner=False)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in self.arrays.values())
+
+    def close(self) -> None:
+        self.arrays = {}
+        for block in self._blocks.values():
+            block.close()
+            if self._owner:
+                block.unlink()
+        self._blocks = {}
+
+
+# ------------------------
+# Grouped Frame
+# ------------------------
+class SharedGroupedFrame:
+    """
+    violation columns in shared memory, stored sorted by a group column
+    rows of one group key are the contiguous slice [start:stop] of every column;
+    order[start:stop] holds their original row positions
+    """
+
+    def __init__(self, shared: SharedColumns, data_columns: List[str], offsets: Dict, group_col: str):
+        self.shared = shared
+        self.data_columns = data_columns
+        self.offsets = offsets
+        self.group_col = group_col
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, group_col: str = 'route_id',
+                   columns: Optional[Iterable[str]] = None) -> 'SharedGroupedFrame':
+        columns = [c for c in (columns or CORE_COLUMNS) if c in df.columns]
+        if group_col not in columns:
+            columns.append(group_col)
+
+        # stable sort keeps the original row order inside every group
+        keys, key_index = pd.factorize(df[group_col], sort=True)
+        order = np.argsort(keys, kind='stable')
+        bounds = np.searchsorted(keys[order], np.arange(len(key_index) + 1))
+        offsets = {key: (int(bounds[i]), int(bounds[i + 1])) for i, key in enumerate(key_index)}
+
+        arrays, meta = {}, {}
+        for col in columns:
+            values, meta[col] = _encode_column(df[col])
+            arrays[col] = values[order]
+            if meta[col]['kind'] == 'masked':
+                arrays[f'{col}__mask__'] = meta[col].pop('mask')[order]
+                meta[col]['mask'] = f'{col}__mask__'
+
+        arrays['__order__'] = order.astype('int64')
+        shared = SharedColumns.create(arrays, meta)
+        return cls(shared, columns, offsets, group_col)
+
+    def ranges(self, keys: Iterable) -> List[tuple]:
+        """offset ranges of the requested group keys; unknown keys select nothing"""
+        if isinstance(keys, str) or not isinstance(keys, Iterable):
+            keys = [keys]
+        return [self.offsets[k] for k in keys if k in self.offsets]
+
+    @property
+    def spec(self) -> dict:
+        return {'shared': self.shared.spec, 'data_columns': self.data_columns}
+
+    def close(self) -> None:
+        self.shared.close()
+
+
+def select_ranges(order: np.ndarray, ranges: Sequence[tuple]) -> tuple:
+    """
+    selector into the group-ordered columns plus the original row positions it covers
+    one range stays a slice (views); several are gathered back into original row order
+    """
+    if not ranges:
+        return slice(0, 0), order[0:0]
+    if len(ranges) == 1:
+        start, stop = ranges[0]
+        return slice(start, stop), order[start:stop]
+    positions = np.concatenate([np.arange(start, stop) for start, stop in ranges])
+    rows = order[positions]
+    restore = np.argsort(rows, kind='stable')
+    return positions[restore], rows[restore]
+
+
+def build_frame(shared: SharedColumns, data_columns: List[str], ranges: Sequence[tuple]) -> pd.DataFrame:
+    """rebuilding the selected rows as a DataFrame with the original dtypes, indexed by row position"""
+    meta = shared.spec['columns']
+    selector, rows = select_ranges(shared.arrays['__order__'], ranges)
+    columns = {}
+    for col in data_columns:
+        mask = shared.arrays[meta[col]['mask']][selector] if meta[col]['kind'] == 'masked' else None
+        columns[col] = _decode_column(shared.arrays[col][selector], meta[col], mask)
+    return pd.DataFrame(columns, index=rows, copy=False)
+
+
+# ------------------------
+# Worker Side
+# ------------------------
+_WORKER_STATE = {}
+
+
+def _init_worker(spec: dict) -> None:
+    """attaching to the shared blocks once per worker process"""
+    _WORKER_STATE['shared'] = SharedColumns.attach(spec['shared'])
+    _WORKER_STATE['data_columns'] = spec['data_columns']
+
+
+def _run_task(fn: Callable, ranges: Sequence[tuple], args: tuple):
+    return fn(build_frame(_WORKER_STATE['shared'], _WORKER_STATE['data_columns'], ranges), *args)
+
+
+# ------------------------
+# Executor
+# ------------------------
+class SharedFrameExecutor:
+    """
+    running an analysis function over groups of rows (routes, campuses, cohorts, boroughs)
+    in a process pool on top of one shared copy of the violation columns
+
+    fn receives the group's rows as a read-only DataFrame (plus any extra args) and must
+    return something picklable. fn must be importable by the workers (a module-level
+    function such as class_time_summary) unless the start method is fork; mp_context
+    defaults to the platform's start method (spawn on macOS and Windows, where fork is
+    unsafe). with max_workers=1 everything runs in-process on the same shared columns
+    """
+
+    def __init__(self, df: pd.DataFrame, group_col: str = 'route_id',
+                 columns: Optional[Iterable[str]] = None,
+                 max_workers: Optional[int] = None,
+                 mp_context: Optional[str] = None):
+        self.frame = SharedGroupedFrame.from_frame(df, group_col, columns)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.mp_context = mp_context or mp.get_start_method()
+        self._pool = None
+
+    def __enter__(self) -> 'SharedFrameExecutor':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _get_pool(self, max_workers: int) -> ProcessPoolExecutor:
+        if self._pool is None or self._pool._max_workers != max_workers:
+            self.shutdown()
+            self._pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=mp.get_context(self.mp_context),
+                initializer=_init_worker,
+                initargs=(self.frame.spec,),
+            )
+        return self._pool
+
+    def map_groups(self, fn: Callable, groups, *args, max_workers: Optional[int] = None) -> dict:
+        """
+        applying fn to every group and returning {group name: result}
+        groups maps a name to one or more group keys (e.g. campus -> routes);
+        a plain iterable of keys runs fn once per key
+        """
+        if not isinstance(groups, dict):
+            groups = {key: [key] for key in groups}
+        tasks = {name: self.frame.ranges(keys) for name, keys in groups.items()}
+
+        max_workers = max_workers or self.max_workers
+        if max_workers <= 1:
+            return {
+                name: fn(build_frame(self.frame.shared, self.frame.data_columns, ranges), *args)
+                for name, ranges in tasks.items()
+            }
+
+        pool = self._get_pool(max_workers)
+        futures = {name: pool.submit(_run_task, fn, ranges, args) for name, ranges in tasks.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def close(self) -> None:
+        """stopping the workers and releasing the shared memory"""
+        self.shutdown()
+        self.frame.close()
+
+
+def map_groups_serial(df: pd.DataFrame, fn: Callable, groups, *args, group_col: str = 'route_id') -> dict:
+    """reference path: the per-group boolean filtering the notebooks do on a single core"""
+    if not isinstance(groups, dict):
+        groups = {key: [key] for key in groups}
+    return {name: fn(df[df[group_col].isin(keys)], *args) for name, keys in groups.items()}
+
+
+# ------------------------
+# Analysis Functions
+# ------------------------
+def class_time_summary(violations: pd.DataFrame) -> dict:
+    """
+    class time vs non-class time counts for one campus's routes (analyze_cuny_impact)
+    """
+    is_class_time = violations['violation_time'].dt.hour.isin(CLASS_HOURS).rename('is_class_time')
+    class_time_analysis = violations.groupby(is_class_time).agg({
+        'Violation ID': 'count',
+        'is_ticketed': 'sum',
+        'is_technical_issue': 'sum'
+    })
+    class_time_analysis['ticketing_rate'] = class_time_analysis['is_ticketed'] / class_time_analysis['Violation ID']
+    return {'total_violations': len(violations), 'class_time_analysis': class_time_analysis}
+
+
+def violation_type_counts(violations: pd.DataFrame) -> dict:
+    """violation type mix for one cohort of routes (perform_comparative_analysis)"""
+    return violations['Violation Type'].value_counts().to_dict() if len(violations) > 0 else {}
+
+
+# ------------------------
+# Scaling Benchmark
+# ------------------------
+def _results_equal(a, b) -> bool:
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_results_equal(a[k], b[k]) for k in a)
+    if isinstance(a, pd.DataFrame):
+        return isinstance(b, pd.DataFrame) and a.equals(b)
+    if isinstance(a, pd.Series):
+        return isinstance(b, pd.Series) and a.equals(b)
+    return a == b
+
+
+def benchmark_scaling(df: pd.DataFrame, fn: Callable, groups,
+                      worker_counts: Optional[Iterable[int]] = None,
+                      group_col: str = 'route_id',
+                      repeats: int = 1,
+                      executor: Optional['SharedFrameExecutor'] = None) -> pd.DataFrame:
+    """
+    timing the serial filter-per-group path against the shared-memory pool at several
+    worker counts, and checking every pooled result matches the serial one
+    an open executor over df (grouped by group_col) is reused instead of sharing df again
+    """
+    if worker_counts is None:
+        cores = os.cpu_count() or 1
+        worker_counts = sorted({1, 2, 4, 8, 16, cores} & set(range(1, cores + 1)))
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        expected = map_groups_serial(df, fn, groups, group_col=group_col)
+    serial_seconds = (time.perf_counter() - start) / repeats
+
+    rows = [{'workers': 'serial', 'seconds': serial_seconds, 'speedup': 1.0, 'matches_serial': True}]
+    if executor is not None and executor.frame.group_col != group_col:
+        raise ValueError(f"executor is grouped by {executor.frame.group_col!r}, not {group_col!r}")
+    pool_context = contextlib.nullcontext(executor) if executor is not None else SharedFrameExecutor(df, group_col=group_col)
+    with pool_context as executor:
+        for workers in worker_counts:
+            executor.map_groups(fn, groups, max_workers=workers)  # warm up the pool
+            start = time.perf_counter()
+            for _ in range(repeats):
+                result = executor.map_groups(fn, groups, max_workers=workers)
+            seconds = (time.perf_counter() - start) / repeats
+            rows.append({
+                'workers': workers,
+                'seconds': seconds,
+                'speedup': serial_seconds / seconds,
+                'matches_serial': _results_equal(result, expected),
+            })
+
+    return pd.DataFrame(rows)
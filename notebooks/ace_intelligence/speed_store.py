@@ -0,0 +1,208 @@
+"""
+prefix-sum store of monthly route speeds and travel times
+
+speed rows are collapsed to per-route monthly sums and counts on a dense route x month
+grid and cumulated along the month axis. the mean of any metric before or after any
+cutoff month is then two array lookups, for one route or for every route at once,
+so cutoffs can vary per route (actual ACE start dates) without rescanning the data.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+Cutoff = Union[str, datetime, pd.Timestamp]
+
+
+def month_ordinal(values) -> np.ndarray:
+    """converting dates or 'YYYY-MM' strings to integer months (year * 12 + month - 1)"""
+    ts = pd.to_datetime(pd.Series(values))
+    return (ts.dt.year * 12 + ts.dt.month - 1).to_numpy()
+
+
+def cutoff_ordinal(cutoff: Cutoff) -> int:
+    """
+    first month counted as 'after' a cutoff
+    a month belongs to the after period when it starts on or after the cutoff,
+    matching the `month >= cutoff` split used in the notebooks
+    """
+    ts = pd.Timestamp(cutoff)
+    ordinal = ts.year * 12 + ts.month - 1
+    if ts != ts.normalize() or ts.day != 1:
+        ordinal += 1
+    return ordinal
+
+
+def ordinal_to_month(ordinal) -> pd.Timestamp:
+    return pd.Timestamp(year=int(ordinal) // 12, month=int(ordinal) % 12 + 1, day=1)
+
+
+def ace_start_dates_from_flags(df: pd.DataFrame,
+                               route_col: str = 'Route ID',
+                               month_col: str = 'month_dt',
+                               flag_col: str = 'is_ACE') -> pd.Series:
+    """first month each route is flagged as ACE-enforced"""
+    flagged = df[df[flag_col].astype(bool)]
+    return pd.to_datetime(flagged[month_col]).groupby(flagged[route_col]).min().rename('ace_start')
+
+
+def load_ace_start_dates(path: str,
+                         route_col: str = 'Route',
+                         date_col: str = 'Implementation Date') -> pd.Series:
+    """earliest implementation date per route from the MTA ACE enforced routes dataset"""
+    routes = pd.read_csv(path)
+    if date_col not in routes.columns:
+        raise ValueError(f"'{date_col}' not found in {path}; columns: {list(routes.columns)}")
+    routes[route_col] = routes[route_col].astype(str).str.strip()
+    dates = pd.to_datetime(routes[date_col], errors='coerce')
+    return dates.groupby(routes[route_col]).min().dropna().rename('ace_start')
+
+
+# ------------------------
+# Route Speed Store
+# ------------------------
+class RouteSpeedStore:
+    """
+    per-route monthly prefix sums for fast before/after queries at any cutoff
+    """
+
+    def __init__(self, df: pd.DataFrame,
+                 route_col: str = 'Route ID',
+                 month_col: str = 'month_dt',
+                 metrics: Iterable[str] = ('Average Road Speed', 'Average Travel Time')):
+        self.metrics = list(metrics)
+
+        routes = df[route_col].astype(str).str.strip()
+        months = month_ordinal(df[month_col])
+
+        self.routes = np.array(sorted(routes.unique()))
+        self.first_month = int(months.min())
+        self.n_months = int(months.max()) - self.first_month + 1
+        self._route_pos = pd.Series(np.arange(len(self.routes)), index=self.routes)
+        # month starts for every grid column, including the one past the last month
+        self._month_starts = pd.DatetimeIndex(
+            [ordinal_to_month(self.first_month + k) for k in range(self.n_months + 1)]
+        )
+
+        row = self._route_pos[routes].to_numpy()
+        col = months - self.first_month
+
+        # cumulative sums/counts with a leading zero column: _sums[m][:, k] covers months < k
+        self._sums = {}
+        self._counts = {}
+        for metric in self.metrics:
+            values = df[metric].to_numpy(dtype='float64')
+            valid = ~np.isnan(values)
+            sums = np.zeros((len(self.routes), self.n_months))
+            counts = np.zeros((len(self.routes), self.n_months))
+            np.add.at(sums, (row[valid], col[valid]), values[valid])
+            np.add.at(counts, (row[valid], col[valid]), 1)
+            self._sums[metric] = np.hstack([np.zeros((len(self.routes), 1)), sums.cumsum(axis=1)])
+            self._counts[metric] = np.hstack([np.zeros((len(self.routes), 1)), counts.cumsum(axis=1)])
+
+    @classmethod
+    def from_csv(cls, path: str, **kwargs) -> 'RouteSpeedStore':
+        return cls(pd.read_csv(path), **kwargs)
+
+    @property
+    def months(self) -> pd.DatetimeIndex:
+        return self._month_starts[:-1]
+
+    def _positions(self, routes: Optional[Iterable]) -> np.ndarray:
+        if routes is None:
+            return np.arange(len(self.routes))
+        routes = [str(r).strip() for r in routes]
+        return self._route_pos.reindex(routes).dropna().astype(int).to_numpy()
+
+    def _cutoff_columns(self, positions: np.ndarray, cutoff) -> tuple:
+        """
+        grid column of the first 'after' month for each route, plus a mask of routes
+        that have a cutoff at all (a mapping may not cover every route)
+        """
+        if isinstance(cutoff, (dict, pd.Series)):
+            per_route = pd.Series(cutoff)
+            per_route.index = per_route.index.astype(str).str.strip()
+            dates = per_route.reindex(self.routes[positions])
+            known = dates.notna().to_numpy()
+            cols = np.zeros(len(positions), dtype=int)
+            cols[known] = [cutoff_ordinal(d) - self.first_month for d in dates[known]]
+        else:
+            known = np.ones(len(positions), dtype=bool)
+            cols = np.full(len(positions), cutoff_ordinal(cutoff) - self.first_month)
+        return np.clip(cols, 0, self.n_months), known
+
+    def before_after(self, cutoff: Union[Cutoff, Dict, pd.Series],
+                     metric: str = 'Average Road Speed',
+                     routes: Optional[Iterable] = None) -> pd.DataFrame:
+        """
+        mean of metric before and after the cutoff for each route
+        cutoff is one date for every route or a mapping route -> date (e.g. ACE start dates);
+        routes missing from a mapping are dropped
+        """
+        positions = self._positions(routes)
+        cols, known = self._cutoff_columns(positions, cutoff)
+        positions, cols = positions[known], cols[known]
+
+        sums, counts = self._sums[metric], self._counts[metric]
+        before_sum, before_n = sums[positions, cols], counts[positions, cols]
+        after_sum = sums[positions, -1] - before_sum
+        after_n = counts[positions, -1] - before_n
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            before = np.where(before_n > 0, before_sum / before_n, np.nan)
+            after = np.where(after_n > 0, after_sum / after_n, np.nan)
+            pct_change = (after - before) / before * 100
+
+        return pd.DataFrame({
+            'cutoff': self._month_starts[cols],
+            'before': before,
+            'after': after,
+            'pct_change': pct_change,
+            'before_count': before_n.astype(int),
+            'after_count': after_n.astype(int),
+        }, index=pd.Index(self.routes[positions], name='route_id'))
+
+    def pooled_before_after(self, cutoff: Union[Cutoff, Dict, pd.Series],
+                            metric: str = 'Average Road Speed',
+                            routes: Optional[Iterable] = None) -> pd.Series:
+        """pooled before/after mean over a group of routes (weighted by rows, not routes)"""
+        positions = self._positions(routes)
+        cols, known = self._cutoff_columns(positions, cutoff)
+        positions, cols = positions[known], cols[known]
+
+        sums, counts = self._sums[metric], self._counts[metric]
+        before_sum, before_n = sums[positions, cols].sum(), counts[positions, cols].sum()
+        after_sum = sums[positions, -1].sum() - before_sum
+        after_n = counts[positions, -1].sum() - before_n
+
+        before = before_sum / before_n if before_n else np.nan
+        after = after_sum / after_n if after_n else np.nan
+        return pd.Series({
+            'routes': len(positions),
+            'before': before,
+            'after': after,
+            'pct_change': (after - before) / before * 100 if before_n and after_n else np.nan,
+        })
+
+    def control_comparison(self, treated_cutoffs: Union[Dict, pd.Series],
+                           control_routes: Iterable,
+                           control_cutoff: Cutoff,
+                           metric: str = 'Average Road Speed') -> pd.DataFrame:
+        """
+        treated routes (each split at its own ACE start) vs a control group (non-ACE or
+        non-CUNY routes) split at one reference date
+        """
+        return pd.DataFrame({
+            'treated': self.pooled_before_after(treated_cutoffs, metric),
+            'control': self.pooled_before_after(control_cutoff, metric, routes=control_routes),
+        }).T
+
+    def top_bottom(self, cutoff: Union[Cutoff, Dict, pd.Series],
+                   metric: str = 'Average Road Speed',
+                   n: int = 5) -> pd.DataFrame:
+        """network-wide n best and n worst routes by % change, most negative first"""
+        ranked = self.before_after(cutoff, metric).dropna(subset=['pct_change'])
+        ranked = ranked.sort_values('pct_change')
+        return pd.concat([ranked.head(n), ranked.tail(n)]).loc[lambda d: ~d.index.duplicated()]
@@ -0,0 +1,575 @@
+"""
+streaming hotspot detector for ACE violations
+
+violations are consumed in First Occurrence order, either replayed from the historical
+CSV at a configurable speed or tailed from a CSV that another process appends to (a local
+stand-in for a live feed). per stop the detector keeps exponentially decayed counts with a
+short and a long half-life plus a decayed hour-of-day profile, in fixed-capacity arrays,
+and heavy-hitter (Space-Saving) sketches over stops and stop x hour. an alert is emitted
+when a stop's short-term rate rises well above its own long-term baseline.
+
+decay uses a shared landmark (forward decay): an event at time t adds exp(lambda * (t - L))
+and a count is read back by multiplying by exp(-lambda * (now - L)), so a batch of events
+is one np.add.at instead of decaying every counter on every event.
+
+    python -m ace_intelligence.streaming ../data/raw/violations.csv --speed 86400
+    python -m ace_intelligence.streaming ../data/raw/violations.csv --check
+"""
+
+import argparse
+import os
+import time
+from io import StringIO
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+# ------------------------
+# Constants
+# ------------------------
+TIME_COL = 'First Occurrence'
+STOP_COL = 'Stop ID'
+STOP_NAME_COL = 'Stop Name'
+ROUTE_COL = 'Bus Route ID'
+OCCURRENCE_FORMAT = '%m/%d/%Y %I:%M:%S %p'
+
+SECONDS_PER_DAY = 86400
+LN2 = np.log(2)
+MAX_EXPONENT = 50  # renormalizing the landmark before exp() gets anywhere near overflow
+
+ALERT_COLUMNS = ['event_time', 'stop_id', 'stop_name', 'rate_per_day', 'baseline_per_day',
+                 'ratio', 'peak_hour', 'latency_s']
+
+
+def parse_occurrence(values: pd.Series) -> pd.Series:
+    """parsing First Occurrence strings, falling back to inferred formats for odd rows"""
+    parsed = pd.to_datetime(values, format=OCCURRENCE_FORMAT, errors='coerce')
+    missing = parsed.isna() & values.notna()
+    if missing.any():
+        parsed[missing] = pd.to_datetime(values[missing], errors='coerce')
+    return parsed
+
+
+# ------------------------
+# Event Sources
+# ------------------------
+class EventBatch(NamedTuple):
+    """violations released together by a source, with the wall time they were ingested"""
+    times: np.ndarray        # event time, int64 seconds since epoch, non-decreasing
+    stops: np.ndarray        # stop ids (object)
+    names: Optional[np.ndarray]
+    ingested_at: float       # time.perf_counter() when the source released the batch
+
+
+def _to_events(df: pd.DataFrame) -> pd.DataFrame:
+    """normalizing raw violation rows to event_time / stop_id / stop_name, sorted by time"""
+    events = pd.DataFrame({
+        'event_time': df[TIME_COL] if pd.api.types.is_datetime64_any_dtype(df[TIME_COL])
+        else parse_occurrence(df[TIME_COL]),
+        'stop_id': df[STOP_COL].astype(str).str.strip(),
+        'stop_name': df[STOP_NAME_COL] if STOP_NAME_COL in df.columns else None,
+    })
+    events = events[events['event_time'].notna() & df[STOP_COL].notna().to_numpy()]
+    return events.sort_values('event_time', kind='stable').reset_index(drop=True)
+
+
+def load_replay_events(path: str, chunksize: int = 500_000) -> pd.DataFrame:
+    """reading the columns the detector needs from the violations CSV, in event-time order"""
+    columns = [TIME_COL, STOP_COL, STOP_NAME_COL]
+    chunks = pd.read_csv(path, usecols=lambda c: c in columns, dtype={STOP_COL: str}, chunksize=chunksize)
+    return _to_events(pd.concat(chunks, ignore_index=True))
+
+
+def _event_arrays(events: pd.DataFrame) -> tuple:
+    times = events['event_time'].to_numpy().astype('datetime64[s]').astype('int64')
+    stops = events['stop_id'].to_numpy(dtype=object)
+    names = events['stop_name'].to_numpy(dtype=object) if 'stop_name' in events else None
+    return times, stops, names
+
+
+def _batch_bounds(times: np.ndarray, batch_seconds: int) -> Iterator[tuple]:
+    """(start, stop) positions of the event-time buckets of batch_seconds in sorted times"""
+    bucket = times // batch_seconds
+    bounds = np.concatenate([[0], np.flatnonzero(np.diff(bucket)) + 1, [len(times)]])
+    return zip(bounds[:-1], bounds[1:])
+
+
+def replay(events: pd.DataFrame, speed: Optional[float] = None, batch_seconds: int = 900) -> Iterator[EventBatch]:
+    """
+    releasing events in event-time batches of batch_seconds
+    speed is event seconds per wall second (3600 replays an hour per second);
+    None replays as fast as the detector consumes
+    """
+    times, stops, names = _event_arrays(events)
+    if len(times) == 0:
+        return
+
+    wall_start, event_start = time.perf_counter(), times[0]
+    for start, stop in _batch_bounds(times, batch_seconds):
+        if speed:
+            delay = wall_start + (times[stop - 1] - event_start) / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        yield EventBatch(times[start:stop], stops[start:stop],
+                         names[start:stop] if names is not None else None, time.perf_counter())
+
+
+def follow_csv(path: str, poll_seconds: float = 1.0, idle_timeout: Optional[float] = None,
+               batch_seconds: int = 900) -> Iterator[EventBatch]:
+    """
+    tailing a violations CSV that another process appends to (a local feed stand-in)
+    each poll reads the complete lines written since the last one and releases them in
+    event-time batches of batch_seconds, like replay (the first poll of an existing file
+    can span years); stops after idle_timeout seconds without new rows (None follows forever)
+    """
+    header, position, last_data = None, 0, time.monotonic()
+    while True:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            f.seek(position)
+            chunk = f.read()
+        complete = chunk[:chunk.rfind('\n') + 1]
+        position += len(complete.encode('utf-8'))
+
+        lines = complete.splitlines()
+        if header is None and lines:
+            header, lines = lines[0], lines[1:]
+
+        if lines:
+            last_data = time.monotonic()
+            raw = pd.read_csv(StringIO('\n'.join([header] + lines)), dtype={STOP_COL: str})
+            times, stops, names = _event_arrays(_to_events(raw))
+            ingested_at = time.perf_counter()
+            if len(times):
+                for start, stop in _batch_bounds(times, batch_seconds):
+                    yield EventBatch(times[start:stop], stops[start:stop], names[start:stop], ingested_at)
+        elif idle_timeout is not None and time.monotonic() - last_data > idle_timeout:
+            return
+        else:
+            time.sleep(poll_seconds)
+
+
+# ------------------------
+# Heavy Hitters
+# ------------------------
+class SpaceSaving:
+    """
+    batched Space-Saving sketch over k counters
+    counts overestimate a key by at most its recorded error; misses in a batch replace
+    the smallest counters in bulk (at most k // 2 at a time, keeping error <= 2N/k)
+    """
+
+    def __init__(self, k: int = 200):
+        self.k = k
+        self.keys = np.empty(k, dtype=object)
+        self.counts = np.zeros(k)
+        self.errors = np.zeros(k)
+        self.index = {}
+
+    def update(self, weights: Dict) -> None:
+        misses = []
+        for key, w in weights.items():
+            i = self.index.get(key)
+            if i is None:
+                misses.append((key, w))
+            else:
+                self.counts[i] += w
+
+        while misses:
+            take, misses = misses[:self.k // 2], misses[self.k // 2:]
+            slots = np.argpartition(self.counts, len(take) - 1)[:len(take)]
+            for slot, (key, w) in zip(slots, take):
+                old = self.keys[slot]
+                if old is not None:
+                    del self.index[old]
+                self.keys[slot] = key
+                self.index[key] = slot
+                self.errors[slot] = self.counts[slot]
+                self.counts[slot] += w
+
+    def scale(self, factor: float) -> None:
+        self.counts *= factor
+        self.errors *= factor
+
+    def top(self, n: int = 10, factor: float = 1.0) -> pd.DataFrame:
+        used = np.flatnonzero(self.keys != None)  # noqa: E711 (elementwise on object array)
+        order = used[np.argsort(-self.counts[used], kind='stable')][:n]
+        return pd.DataFrame({
+            'key': self.keys[order],
+            'count': self.counts[order] * factor,
+            'error': self.errors[order] * factor,
+        })
+
+
+# ------------------------
+# Hotspot Detector
+# ------------------------
+class HotspotDetector:
+    """
+    bounded-memory decayed stop x hour counts with per-stop baseline alerts
+
+    fast/slow half-lives set the "current" and "baseline" windows; a stop alerts when its
+    fast rate is at least `ratio` times its baseline rate (floored at min_baseline_per_day),
+    its decayed fast count is at least min_events, it has been observed for warmup_days,
+    and it has not alerted within cooldown_days. alerts fire on the rising edge only: after
+    an alert the stop stays quiet until its fast rate has dropped back below `ratio` times
+    its baseline, so a decaying burst does not re-alert on every later event
+    """
+
+    def __init__(self,
+                 fast_half_life_days: float = 1.0,
+                 slow_half_life_days: float = 28.0,
+                 ratio: float = 3.0,
+                 min_events: float = 10.0,
+                 min_baseline_per_day: float = 1.0,
+                 warmup_days: float = 14.0,
+                 cooldown_days: float = 1.0,
+                 capacity: int = 32768,
+                 sketch_size: int = 200):
+        self.fast_lambda = LN2 / (fast_half_life_days * SECONDS_PER_DAY)
+        self.slow_lambda = LN2 / (slow_half_life_days * SECONDS_PER_DAY)
+        self.ratio = ratio
+        self.min_events = min_events
+        self.min_baseline_rate = min_baseline_per_day / SECONDS_PER_DAY
+        self.warmup = warmup_days * SECONDS_PER_DAY
+        self.cooldown = cooldown_days * SECONDS_PER_DAY
+
+        # one slot per tracked stop; the weakest stops are evicted when capacity is reached
+        self.capacity = capacity
+        self.slots: Dict[str, int] = {}
+        self.free = list(range(capacity - 1, -1, -1))
+        self.stop_ids = np.empty(capacity, dtype=object)
+        self.stop_names = np.empty(capacity, dtype=object)
+        self.fast = np.zeros(capacity)
+        self.slow = np.zeros(capacity)
+        self.hourly = np.zeros((capacity, 24))
+        self.first_seen = np.zeros(capacity, dtype='int64')
+        self.last_alert = np.full(capacity, np.iinfo('int64').min // 2, dtype='int64')
+        self.alerting = np.zeros(capacity, dtype=bool)  # alerted and not yet back below the ratio
+
+        self.stop_sketch = SpaceSaving(sketch_size)
+        self.stop_hour_sketch = SpaceSaving(sketch_size)
+
+        self.landmark = None
+        self.now = None
+        self.alerts: List[dict] = []
+        self.events = 0
+        self._latencies: List[float] = []
+        self._batch_sizes: List[int] = []
+        self._busy_seconds = 0.0
+
+    # ------------------------
+    # Decayed State
+    # ------------------------
+    def _renormalize(self, t: int) -> None:
+        """moving the landmark forward to t so forward-decay weights stay small"""
+        fast_factor = np.exp(-self.fast_lambda * (t - self.landmark))
+        slow_factor = np.exp(-self.slow_lambda * (t - self.landmark))
+        self.fast *= fast_factor
+        self.slow *= slow_factor
+        self.hourly *= slow_factor
+        self.stop_sketch.scale(fast_factor)
+        self.stop_hour_sketch.scale(fast_factor)
+        self.landmark = t
+
+    def _evict(self, needed: int, keep: set) -> None:
+        """freeing at least `needed` slots (normally a quarter) with the lowest baseline, never one in keep"""
+        used = np.fromiter((slot for slot in self.slots.values() if slot not in keep), dtype='int64')
+        count = min(max(needed, len(self.slots) // 4), len(used))
+        victims = used[np.argsort(self.slow[used], kind='stable')[:count]]
+        for slot in victims:
+            del self.slots[self.stop_ids[slot]]
+        self.stop_ids[victims] = None
+        self.fast[victims] = self.slow[victims] = 0
+        self.hourly[victims] = 0
+        self.free.extend(victims.tolist())
+
+    def _assign_slots(self, stops: np.ndarray, times: np.ndarray) -> np.ndarray:
+        """
+        slot of every event's stop, giving new stops a slot first seen at their first event
+        room for all of the batch's new stops is made up front, so eviction never frees a
+        slot this batch uses
+        """
+        new = {}
+        for stop, t in zip(stops, times.tolist()):
+            if stop not in self.slots and stop not in new:
+                new[stop] = t
+        if len(new) > len(self.free):
+            keep = {self.slots[stop] for stop in set(stops) if stop in self.slots}
+            if len(keep) + len(new) > self.capacity:
+                raise ValueError(f"batch touches {len(keep) + len(new):,} stops but capacity is "
+                                 f"{self.capacity:,}; use shorter batches or a larger capacity")
+            self._evict(len(new) - len(self.free), keep)
+
+        for stop, t in new.items():
+            slot = self.free.pop()
+            self.slots[stop] = slot
+            self.stop_ids[slot] = stop
+            self.first_seen[slot] = t
+            self.last_alert[slot] = np.iinfo('int64').min // 2
+            self.alerting[slot] = False
+        return np.fromiter((self.slots[stop] for stop in stops), dtype='int64', count=len(stops))
+
+    def _current(self, slots: np.ndarray, t: Optional[int] = None) -> tuple:
+        """decayed fast and slow counts of slots at time t (default: the current time)"""
+        t = self.now if t is None else t
+        fast = self.fast[slots] * np.exp(-self.fast_lambda * (t - self.landmark))
+        slow = self.slow[slots] * np.exp(-self.slow_lambda * (t - self.landmark))
+        return fast, slow
+
+    def _rates(self, slots: np.ndarray, t: Optional[int] = None) -> tuple:
+        """decayed fast count, fast rate and floored baseline rate (per second) at time t"""
+        fast, slow = self._current(slots, t)
+        return fast, fast * self.fast_lambda, np.maximum(slow * self.slow_lambda, self.min_baseline_rate)
+
+    def _rearm(self, slots: np.ndarray, t: int) -> None:
+        """clearing the alerting flag of slots whose rate has fallen back below the ratio by t"""
+        slots = slots[self.alerting[slots]]
+        if len(slots):
+            _, fast_rate, baseline_rate = self._rates(slots, t)
+            self.alerting[slots[fast_rate < self.ratio * baseline_rate]] = False
+
+    # ------------------------
+    # Processing
+    # ------------------------
+    def process(self, batch: EventBatch) -> List[dict]:
+        """folding one batch into the counters and returning the alerts it triggers"""
+        tick = time.perf_counter()
+        times = batch.times
+        if len(times) == 0:
+            return []
+        if self.landmark is None:
+            self.landmark = int(times[0])
+        previous = self.now
+
+        slots = self._assign_slots(batch.stops, times)
+        if batch.names is not None:
+            self.stop_names[slots] = batch.names
+        touched = np.unique(slots)
+
+        # a stop that went quiet after its last alert is rearmed before this batch's events
+        if previous is not None:
+            self._rearm(touched, max(int(times[0]), previous))
+        self.now = max(int(times[-1]), previous or self.landmark)
+
+        # folding in pieces that each fit within MAX_EXPONENT of the landmark, moving the
+        # landmark up to the next piece whenever its events would overflow exp()
+        span = int(MAX_EXPONENT / self.fast_lambda)
+        start = 0
+        while start < len(times):
+            if self.fast_lambda * (times[start] - self.landmark) > MAX_EXPONENT:
+                self._renormalize(int(times[start]))
+            stop = int(np.searchsorted(times, self.landmark + span, side='right'))
+            stop = max(stop, start + 1)
+            self._fold(batch.stops[start:stop], slots[start:stop], times[start:stop])
+            start = stop
+
+        alerts = self._check(touched)
+
+        done = time.perf_counter()
+        self._busy_seconds += done - tick
+        self.events += len(times)
+        self._latencies.append(done - batch.ingested_at)
+        self._batch_sizes.append(len(times))
+        for alert in alerts:
+            alert['latency_s'] = done - batch.ingested_at
+        self.alerts.extend(alerts)
+        return alerts
+
+    def _fold(self, stops: np.ndarray, slots: np.ndarray, times: np.ndarray) -> None:
+        """adding events to the counters and sketches with forward-decay weights"""
+        offset = times - self.landmark
+        fast_w = np.exp(self.fast_lambda * offset)
+        slow_w = np.exp(self.slow_lambda * offset)
+        hours = (times % SECONDS_PER_DAY) // 3600
+        np.add.at(self.fast, slots, fast_w)
+        np.add.at(self.slow, slots, slow_w)
+        np.add.at(self.hourly, (slots, hours), slow_w)
+
+        # heavy hitters on the fast decay so they track the current window
+        stop_weights, stop_hour_weights = {}, {}
+        for stop, hour, w in zip(stops, hours.tolist(), fast_w.tolist()):
+            stop_weights[stop] = stop_weights.get(stop, 0.0) + w
+            stop_hour_weights[(stop, hour)] = stop_hour_weights.get((stop, hour), 0.0) + w
+        self.stop_sketch.update(stop_weights)
+        self.stop_hour_sketch.update(stop_hour_weights)
+
+    def _check(self, slots: np.ndarray) -> List[dict]:
+        fast, fast_rate, baseline_rate = self._rates(slots)
+        self.alerting[slots[fast_rate < self.ratio * baseline_rate]] = False
+
+        hot = (
+            (fast >= self.min_events)
+            & (fast_rate >= self.ratio * baseline_rate)
+            & ~self.alerting[slots]
+            & (self.now - self.first_seen[slots] >= self.warmup)
+            & (self.now - self.last_alert[slots] >= self.cooldown)
+        )
+        alerts = []
+        for i in np.flatnonzero(hot):
+            slot = slots[i]
+            self.last_alert[slot] = self.now
+            self.alerting[slot] = True
+            alerts.append({
+                'event_time': pd.Timestamp(self.now, unit='s'),
+                'stop_id': self.stop_ids[slot],
+                'stop_name': self.stop_names[slot],
+                'rate_per_day': fast_rate[i] * SECONDS_PER_DAY,
+                'baseline_per_day': baseline_rate[i] * SECONDS_PER_DAY,
+                'ratio': fast_rate[i] / baseline_rate[i],
+                'peak_hour': int(np.argmax(self.hourly[slot])),
+            })
+        return alerts
+
+    def run(self, batches: Iterable[EventBatch],
+            on_alert: Optional[Callable[[dict], None]] = None,
+            report_every: Optional[int] = None) -> pd.DataFrame:
+        """consuming a source to the end and returning every alert raised"""
+        start = time.perf_counter()
+        next_report = report_every
+        for batch in batches:
+            for alert in self.process(batch):
+                if on_alert is not None:
+                    on_alert(alert)
+            if report_every and self.events >= next_report:
+                print(f"  {self.events:,} events replayed, {len(self.alerts):,} alerts, "
+                      f"{self.events / (time.perf_counter() - start):,.0f} events/s")
+                next_report += report_every
+        self._wall_seconds = time.perf_counter() - start
+        return pd.DataFrame(self.alerts, columns=ALERT_COLUMNS)
+
+    # ------------------------
+    # Reporting
+    # ------------------------
+    def snapshot(self, n: Optional[int] = None) -> pd.DataFrame:
+        """current rate and baseline of every tracked stop, hottest first"""
+        slots = np.fromiter(self.slots.values(), dtype='int64')
+        fast, slow = self._current(slots)
+        table = pd.DataFrame({
+            'stop_id': self.stop_ids[slots],
+            'stop_name': self.stop_names[slots],
+            'rate_per_day': fast * self.fast_lambda * SECONDS_PER_DAY,
+            'baseline_per_day': slow * self.slow_lambda * SECONDS_PER_DAY,
+            'peak_hour': self.hourly[slots].argmax(axis=1),
+        })
+        table['ratio'] = table['rate_per_day'] / table['baseline_per_day'].clip(lower=self.min_baseline_rate * SECONDS_PER_DAY)
+        table = table.sort_values('rate_per_day', ascending=False, kind='stable').reset_index(drop=True)
+        return table.head(n) if n else table
+
+    def heavy_hitters(self, n: int = 10, by_hour: bool = False) -> pd.DataFrame:
+        """top stops (or stop x hour cells) by decayed count in the current window"""
+        sketch = self.stop_hour_sketch if by_hour else self.stop_sketch
+        factor = np.exp(-self.fast_lambda * (self.now - self.landmark)) if self.now is not None else 1.0
+        top = sketch.top(n, factor)
+        if by_hour:
+            top[['stop_id', 'hour']] = pd.DataFrame(top.pop('key').tolist(), index=top.index)
+        else:
+            top = top.rename(columns={'key': 'stop_id'})
+        return top
+
+    def stats(self) -> dict:
+        """throughput and end-to-end latency (source release -> alerts evaluated) so far"""
+        latencies = np.repeat(self._latencies, self._batch_sizes) if self._latencies else np.zeros(1)
+        wall = getattr(self, '_wall_seconds', None)
+        return {
+            'events': self.events,
+            'batches': len(self._batch_sizes),
+            'alerts': len(self.alerts),
+            'tracked_stops': len(self.slots),
+            'busy_seconds': self._busy_seconds,
+            'wall_seconds': wall,
+            'events_per_second': self.events / self._busy_seconds if self._busy_seconds else np.nan,
+            'latency_p50_ms': np.percentile(latencies, 50) * 1000,
+            'latency_p95_ms': np.percentile(latencies, 95) * 1000,
+            'latency_max_ms': latencies.max() * 1000,
+        }
+
+
+# ------------------------
+# Regression Check
+# ------------------------
+def check_follow_matches_replay(path: str, batch_seconds: int = 900, **detector_args) -> dict:
+    """
+    running a (multi-year) violations CSV through follow_csv and through replay and
+    checking that both end in the same finite state; follow mode reads the whole file in
+    its first poll, so this covers landmark renormalization across a long backlog
+    """
+    replayed = HotspotDetector(**detector_args)
+    replayed.run(replay(load_replay_events(path), batch_seconds=batch_seconds))
+    followed = HotspotDetector(**detector_args)
+    followed.run(follow_csv(path, poll_seconds=0, idle_timeout=0, batch_seconds=batch_seconds))
+
+    snapshot = followed.snapshot()
+    rates = snapshot[['rate_per_day', 'baseline_per_day']].to_numpy()
+    if not np.isfinite(rates).all():
+        raise AssertionError(f"follow mode produced {(~np.isfinite(rates)).sum():,} non-finite rates")
+    if any(followed.stop_ids[slot] != stop for stop, slot in followed.slots.items()):
+        raise AssertionError("two stops share a detector slot")
+    pd.testing.assert_frame_equal(snapshot, replayed.snapshot())
+
+    # everything but the wall-clock latency has to agree
+    compared = ALERT_COLUMNS[:-1]
+    pd.testing.assert_frame_equal(pd.DataFrame(followed.alerts, columns=compared),
+                                  pd.DataFrame(replayed.alerts, columns=compared))
+    return {
+        'events': followed.events,
+        'years': float(followed.now - followed.first_seen[list(followed.slots.values())].min()) / (365 * SECONDS_PER_DAY),
+        'tracked_stops': len(followed.slots),
+        'alerts': len(followed.alerts),
+    }
+
+
+# ------------------------
+# Command Line Replay
+# ------------------------
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="replaying ACE violations through the streaming hotspot detector")
+    parser.add_argument('path', help="violations CSV (MTA Bus Automated Camera Enforcement Violations)")
+    parser.add_argument('--speed', type=float, default=None,
+                        help="event seconds per wall second; omit to replay as fast as possible")
+    parser.add_argument('--batch-seconds', type=int, default=900, help="event-time width of each replay batch")
+    parser.add_argument('--follow', action='store_true', help="tail the CSV as a live feed instead of replaying it")
+    parser.add_argument('--idle-timeout', type=float, default=None, help="stop following after this many idle seconds")
+    parser.add_argument('--ratio', type=float, default=3.0, help="alert when a stop's rate is this many times its baseline")
+    parser.add_argument('--alerts-out', default=None, help="optional CSV path for the alerts")
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--check', action='store_true',
+                        help="check that following the CSV ends in the same state as replaying it, then exit")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        result = check_follow_matches_replay(args.path, args.batch_seconds, ratio=args.ratio)
+        print(f"follow and replay agree: {result}")
+        return
+
+    detector = HotspotDetector(ratio=args.ratio)
+    if args.follow:
+        source = follow_csv(args.path, idle_timeout=args.idle_timeout, batch_seconds=args.batch_seconds)
+    else:
+        print(f"loading {args.path}...")
+        load_start = time.perf_counter()
+        events = load_replay_events(args.path)
+        print(f"loaded {len(events):,} violations in {time.perf_counter() - load_start:.1f}s")
+        source = replay(events, speed=args.speed, batch_seconds=args.batch_seconds)
+
+    alerts = detector.run(source, report_every=500_000)
+
+    print("\nStreaming Hotspot Detector:")
+    print("=" * 40)
+    for key, value in detector.stats().items():
+        print(f"  {key}: {value:,.2f}" if isinstance(value, float) else f"  {key}: {value}")
+
+    print(f"\nTop {args.top} stops in the current window:")
+    print(detector.heavy_hitters(args.top).to_string(index=False))
+
+    if len(alerts):
+        print(f"\nLatest {args.top} alerts:")
+        print(alerts.tail(args.top).to_string(index=False))
+    if args.alerts_out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.alerts_out)), exist_ok=True)
+        alerts.to_csv(args.alerts_out, index=False)
+        print(f"\nalerts saved to {args.alerts_out}")
+
+
+if __name__ == '__main__':
+    main()